@@ -1,129 +1,369 @@
 import os
+import re
+import math
 import json
-from typing import Dict, Any
+import mmap
+import hashlib
+from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Set, Union
+
+# orjson is optional; it parses large analysis files considerably faster
+try:
+    from orjson import loads as _loads
+except ImportError:
+    def _loads(data: bytes):
+        return json.loads(data.decode('utf-8'))
 
 # This script will take the output of java_code_analyzer.py (controllers.json)
 # and generate BDD Gherkin feature files for each API endpoint, including positive and negative scenarios.
 # It will also prepare a stub for step definition generation.
 
+# Precompiled patterns used when scanning feature files and step definitions
+_STEP_PARAM_RE = re.compile(r'\s+<[^>]+>')
+# Matched against raw file bytes so Java sources need not be decoded
+_ANNOTATION_RE = re.compile(rb'@(Given|When|Then)\("([^"]+)"\)')
+_METHOD_NAME_RE = re.compile(r'[^a-zA-Z0-9]')
+# str.translate equivalent of _METHOD_NAME_RE.sub('_', ...).lower() for ASCII text
+_METHOD_NAME_TABLE = {c: (chr(c).lower() if chr(c).isalnum() else '_') for c in range(128)}
+_STEP_PREFIXES = ("Given ", "When ", "Then ")
+
+# Per step-def directory record of the last run, used to skip unchanged work
+_STEP_CACHE_FILE = '.bdd-cache.json'
+
+# Given/Then texts of the generated scenarios; every scenario shares the same When step
+_WHEN_STEP = "When the API is called"
+_POSITIVE_GIVEN = "valid input for {name}"
+_POSITIVE_THEN = "the response should indicate success"
+_VALIDATION_GIVEN = "invalid input that triggers {v}"
+_VALIDATION_THEN = "the response should indicate a validation error for {v}"
+_EXCEPTION_GIVEN = "a situation that causes {e}"
+_EXCEPTION_THEN = "the response should indicate an error for {e}"
+_SERVICE_CALL_GIVEN = "the API depends on {call}"
+_SERVICE_CALL_THEN = "the response should reflect the result of {call}"
+
+# One Gherkin scenario block, preceded by the blank line separating it from the
+# previous block
+_SCENARIO_TMPL = (
+    "\n"
+    "  Scenario: {title}\n"
+    "    Given {given}\n"
+    "    " + _WHEN_STEP + "\n"
+    "    Then {then}\n"
+)
+_VALIDATION_TMPL = _SCENARIO_TMPL.format(
+    title="Validation error - {v}", given=_VALIDATION_GIVEN, then=_VALIDATION_THEN)
+_EXCEPTION_TMPL = _SCENARIO_TMPL.format(
+    title="Exception - {e}", given=_EXCEPTION_GIVEN, then=_EXCEPTION_THEN)
+_SERVICE_CALL_TMPL = _SCENARIO_TMPL.format(
+    title="Dependency call - {call}", given=_SERVICE_CALL_GIVEN, then=_SERVICE_CALL_THEN)
+
+@lru_cache(maxsize=16)
+def _load_analysis_cached(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    return _loads(Path(path).read_bytes())
+
 def load_analysis(json_path: str) -> Dict[str, Any]:
-    with open(json_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """
+    Load the analysis JSON, reusing the parsed result while the file is unchanged.
+    The returned dict is shared between calls and must not be mutated.
+    """
+    st = os.stat(json_path)
+    return _load_analysis_cached(os.path.abspath(json_path), st.st_mtime_ns, st.st_size)
+
+# validations and exceptions are usually shared by every endpoint, so their
+# rendered blocks are cached; arguments must be tuples to be hashable
+@lru_cache(maxsize=None)
+def _render_validations(validations: tuple) -> str:
+    return ''.join(_VALIDATION_TMPL.format(v=v) for v in validations)
+
+@lru_cache(maxsize=None)
+def _render_exceptions(exceptions: tuple) -> str:
+    return ''.join(_EXCEPTION_TMPL.format(e=e) for e in exceptions)
+
+def _render_cached(render, items) -> str:
+    items = tuple(items)
+    try:
+        return render(items)
+    except TypeError:
+        # Unhashable entries (e.g. dicts) cannot be cached
+        return render.__wrapped__(items)
 
 def scenario_for_endpoint(controller, endpoint, dtos, validations, exceptions, service_calls):
     """
     Generate positive and negative BDD scenarios for a given endpoint, including service calls.
     """
-    feature_lines = []
-    feature_lines.append(f"Feature: {endpoint['name']} endpoint in {controller['name']}")
-    feature_lines.append("")
+    ep_name = endpoint['name']
+    header = f"Feature: {ep_name} endpoint in {controller['name']}\n"
     # Positive scenario
-    feature_lines.append(f"  Scenario: Successful call to {endpoint['name']}")
-    feature_lines.append(f"    Given valid input for {endpoint['name']}")
-    feature_lines.append(f"    When the API is called")
-    feature_lines.append(f"    Then the response should indicate success")
-    feature_lines.append("")
-    # Negative scenarios from validations
+    positive = _SCENARIO_TMPL.format(
+        title=f"Successful call to {ep_name}",
+        given=_POSITIVE_GIVEN.format(name=ep_name),
+        then=_POSITIVE_THEN)
+    # Negative scenarios from validations and exceptions, then scenarios for service calls
+    return (header + positive
+            + _render_cached(_render_validations, validations)
+            + _render_cached(_render_exceptions, exceptions)
+            # Service calls differ per endpoint, so caching them would rarely hit
+            + ''.join(_SERVICE_CALL_TMPL.format(call=call) for call in service_calls))
+
+def _parallel_map(func, items, jobs: int = 1, chunksize: int = 1):
+    """
+    Map func over items, in worker processes when there is more than one chunk of work.
+    Results are returned in input order.
+    """
+    items = list(items)
+    # Every pool worker is started up front, so never start more than there are chunks
+    workers = min(jobs, math.ceil(len(items) / chunksize))
+    if workers <= 1:
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(func, items, chunksize=chunksize))
+
+def _scenario_steps(given: str, then: str):
+    """
+    Return the Given and Then steps of a generated scenario, as extract_steps_from_feature reads them.
+    """
+    return _clean_step("Given " + given), _clean_step("Then " + then)
+
+def _shared_steps(validations, exceptions) -> Set[str]:
+    """
+    Return the steps that appear in every generated feature file.
+    """
+    steps = {_WHEN_STEP, _clean_step("Then " + _POSITIVE_THEN)}
     for v in validations:
-        feature_lines.append(f"  Scenario: Validation error - {v}")
-        feature_lines.append(f"    Given invalid input that triggers {v}")
-        feature_lines.append(f"    When the API is called")
-        feature_lines.append(f"    Then the response should indicate a validation error for {v}")
-        feature_lines.append("")
-    # Negative scenarios from exceptions
+        steps.update(_scenario_steps(_VALIDATION_GIVEN.format(v=v), _VALIDATION_THEN.format(v=v)))
     for e in exceptions:
-        feature_lines.append(f"  Scenario: Exception - {e}")
-        feature_lines.append(f"    Given a situation that causes {e}")
-        feature_lines.append(f"    When the API is called")
-        feature_lines.append(f"    Then the response should indicate an error for {e}")
-        feature_lines.append("")
-    # Scenarios for service calls
+        steps.update(_scenario_steps(_EXCEPTION_GIVEN.format(e=e), _EXCEPTION_THEN.format(e=e)))
+    return steps
+
+def _write_feature(task):
+    """
+    Render and write the feature file for one endpoint; returns its path and
+    the steps specific to that endpoint (see _shared_steps for the rest).
+    """
+    controller, endpoint, dtos, validations, exceptions, feature_file = task
+    service_calls = endpoint.get('service_calls', [])
+    feature_content = scenario_for_endpoint(controller, endpoint, dtos, validations, exceptions, service_calls)
+    feature_file.write_text(feature_content, encoding='utf-8')
+    # Steps come from the template inputs, so the file never needs re-reading
+    steps = {_clean_step("Given " + _POSITIVE_GIVEN.format(name=endpoint['name']))}
     for call in service_calls:
-        feature_lines.append(f"  Scenario: Dependency call - {call}")
-        feature_lines.append(f"    Given the API depends on {call}")
-        feature_lines.append(f"    When the API is called")
-        feature_lines.append(f"    Then the response should reflect the result of {call}")
-        feature_lines.append("")
-    return '\n'.join(feature_lines)
-
-def generate_bdd_features(analysis: Dict[str, Any], output_dir: str):
+        steps.update(_scenario_steps(_SERVICE_CALL_GIVEN.format(call=call), _SERVICE_CALL_THEN.format(call=call)))
+    return feature_file, steps
+
+def generate_bdd_features(analysis: Dict[str, Any], output_dir: str, jobs: int = 1) -> Set[str]:
+    """
+    Write a feature file per endpoint and return the set of steps they contain.
+    """
     os.makedirs(output_dir, exist_ok=True)
+    # These lists are shared by every endpoint
+    dtos = analysis.get('dtos', [])
+    validations = tuple(analysis.get('validations', []))
+    exceptions = tuple(analysis.get('exceptions', []))
+    join = Path(output_dir).__truediv__
+    tasks = []
+    append = tasks.append
     for controller in analysis.get('controllers', []):
+        controller_name = controller['name']
         for endpoint in controller.get('endpoints', []):
-            dtos = analysis.get('dtos', [])
-            validations = analysis.get('validations', [])
-            exceptions = analysis.get('exceptions', [])
-            service_calls = endpoint.get('service_calls', [])
-            feature_content = scenario_for_endpoint(controller, endpoint, dtos, validations, exceptions, service_calls)
-            feature_file = os.path.join(output_dir, f"{controller['name']}_{endpoint['name']}.feature")
-            with open(feature_file, 'w', encoding='utf-8') as f:
-                f.write(feature_content)
-            print(f"Generated: {feature_file}")
+            feature_file = join(f"{controller_name}_{endpoint['name']}.feature")
+            append((controller, endpoint, dtos, validations, exceptions, feature_file))
+    generated = []
+    all_steps = _shared_steps(validations, exceptions) if tasks else set()
+    for feature_file, steps in _parallel_map(_write_feature, tasks, jobs, chunksize=16):
+        generated.append(str(feature_file))
+        all_steps.update(steps)
+    if len(generated) == 1:
+        print(f"Generated: {generated[0]}")
+    elif generated:
+        print(f"Generated {len(generated)} feature files: {generated[0]} ... {generated[-1]}")
+    return all_steps
 
 # --- Step Definition Generator/Updater ---
-def extract_steps_from_feature(feature_content: str):
-    """
-    Extract Given/When/Then steps from a Gherkin feature string.
-    """
-    import re
-    steps = set()
-    for line in feature_content.splitlines():
-        line = line.strip()
-        if line.startswith("Given ") or line.startswith("When ") or line.startswith("Then "):
-            # Remove parameters for step definition matching
-            step = re.sub(r'\s+<[^>]+>', '', line)
-            steps.add(step)
-    return steps
+def _clean_step(line: str) -> str:
+    """
+    Strip trailing whitespace and parameters from a step line for step definition matching.
+    """
+    return _STEP_PARAM_RE.sub('', line.rstrip())
 
-def find_existing_step_defs(step_def_dir: str):
+def _normalize_step(step: str) -> str:
+    """
+    Collapse runs of whitespace so steps differing only in spacing compare equal.
+    Only used as a comparison key; stubs keep the original step text, since
+    Cucumber matches whitespace literally.
+    """
+    return ' '.join(step.split())
+
+def extract_steps_from_feature(lines: Union[str, Iterable[str]]):
+    """
+    Yield Given/When/Then steps from Gherkin feature lines.
+    Accepts any iterable of lines (e.g. an open file) or a whole feature string.
+    Steps are yielded as found and may repeat; collect them into a set.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    for raw in lines:
+        line = raw.lstrip()
+        if line.startswith(_STEP_PREFIXES):
+            # Trailing whitespace only needs stripping on actual step lines
+            yield _clean_step(line)
+
+def _iter_java_entries(root_dir: str):
+    """
+    Yield DirEntry objects for all .java files under root_dir, walking with os.scandir.
+    Unreadable directories are skipped, as os.walk does by default.
+    """
+    stack = [root_dir]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.java') and entry.is_file():
+                    yield entry
+
+def _iter_java_files(root_dir: str):
+    """
+    Yield paths of all .java files under root_dir.
+    """
+    for entry in _iter_java_entries(root_dir):
+        yield entry.path
+
+def _scan_one_java(path: str):
+    """
+    Return the step texts of all @Given/@When/@Then annotations in one Java file.
+    """
+    with open(path, 'rb') as f:
+        # mmap cannot map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return set()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Only the short captured step text is decoded
+            return {_normalize_step(match.group(2).decode('utf-8')) for match in _ANNOTATION_RE.finditer(mm)}
+
+def find_existing_step_defs(step_def_dir: str, jobs: int = 1):
     """
     Find all existing step definition method names in Java files in the given directory.
     """
-    import re
-    step_defs = set()
-    for root, _, files in os.walk(step_def_dir):
-        for file in files:
-            if file.endswith('.java'):
-                with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Look for @Given/@When/@Then annotations
-                    for match in re.finditer(r'@(Given|When|Then)\("([^"]+)"\)', content):
-                        step_defs.add(match.group(2))
-    return step_defs
+    results = _parallel_map(_scan_one_java, _iter_java_files(step_def_dir), jobs, chunksize=64)
+    return set().union(*results)
 
 def generate_java_step_def(step: str) -> str:
     """
     Generate a Java method stub for a Cucumber step definition.
     """
-    import re
     annotation = step.split(' ', 1)[0]
     step_text = step[len(annotation):].strip()
-    method_name = re.sub(r'[^a-zA-Z0-9]', '_', step_text).lower()
+    if step_text.isascii():
+        method_name = step_text.translate(_METHOD_NAME_TABLE)
+    else:
+        method_name = _METHOD_NAME_RE.sub('_', step_text).lower()
     return f'''    @{annotation}("{step_text}")\n    public void {method_name}() {{\n        // TODO: Implement step\n    }}\n'''
 
-def update_or_create_step_defs(feature_dir: str, step_def_dir: str):
+def _feature_fingerprint(feature_dir: str):
     """
-    For each feature file, ensure all steps have a Java step definition.
-    If not present, append stub to a StepDefinitions.java file.
+    Return the .feature file paths in feature_dir and a digest of their names, mtimes and sizes.
     """
-    all_steps = set()
-    for file in os.listdir(feature_dir):
-        if file.endswith('.feature'):
-            with open(os.path.join(feature_dir, file), 'r', encoding='utf-8') as f:
-                feature_content = f.read()
-                all_steps |= extract_steps_from_feature(feature_content)
-    existing_steps = find_existing_step_defs(step_def_dir)
-    missing_steps = all_steps - existing_steps
+    paths = []
+    stats = []
+    with os.scandir(feature_dir) as it:
+        for entry in it:
+            if entry.name.endswith('.feature'):
+                st = entry.stat()
+                paths.append(entry.path)
+                stats.append((entry.name, st.st_mtime_ns, st.st_size))
+    digest = hashlib.blake2b(repr(sorted(stats)).encode('utf-8'), digest_size=16).hexdigest()
+    return paths, digest
+
+def _java_fingerprint(step_def_dir: str) -> str:
+    """
+    Return a digest of the paths, mtimes and sizes of all .java files under step_def_dir.
+    """
+    stats = []
+    for entry in _iter_java_entries(step_def_dir):
+        st = entry.stat()
+        stats.append((entry.path, st.st_mtime_ns, st.st_size))
+    return hashlib.blake2b(repr(sorted(stats)).encode('utf-8'), digest_size=16).hexdigest()
+
+def _read_step_cache(cache_file: str) -> Dict[str, Any]:
+    try:
+        cache = _loads(Path(cache_file).read_bytes())
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def _add_missing_step_defs(all_steps, step_def_dir: str, jobs: int, cache: Dict[str, Any], digest, java_key=None):
+    """
+    Append stubs for steps in all_steps without a Java step definition, then record the run in the cache.
+    java_key is the current _java_fingerprint of step_def_dir; without it the Java files are always rescanned.
+    """
+    step_def_file = os.path.join(step_def_dir, 'StepDefinitions.java')
+    # Steps are compared by their normalized form; the first original spelling
+    # (in sorted order) is the one a stub gets generated for
+    steps_by_key = {}
+    for step in sorted(all_steps):
+        steps_by_key.setdefault(_normalize_step(step), step)
+    if not steps_by_key:
+        # Nothing to define; no need to scan the Java files
+        missing_steps = []
+    elif java_key is not None and cache.get('java') == java_key and steps_by_key.keys() <= set(cache.get('steps', ())):
+        # Every step already had a definition last run; no need to rescan the Java files
+        missing_steps = []
+    else:
+        existing_steps = find_existing_step_defs(step_def_dir, jobs)
+        # Annotations hold the step text without its Given/When/Then keyword
+        missing_steps = [step for key, step in steps_by_key.items() if key.partition(' ')[2] not in existing_steps]
+    if missing_steps:
+        # Sorted so the appended stubs are deterministic and diff-friendly
+        stubs = '\n'.join(generate_java_step_def(step) for step in missing_steps) + '\n'
+        with open(step_def_file, 'a', encoding='utf-8') as f:
+            f.write(stubs)
+    if missing_steps or java_key is None:
+        java_key = _java_fingerprint(step_def_dir)
+    # All steps are defined at this point
+    cache = {'digest': digest, 'java': java_key, 'steps': sorted(steps_by_key)}
+    try:
+        Path(step_def_dir, _STEP_CACHE_FILE).write_text(json.dumps(cache), encoding='utf-8')
+    except OSError:
+        # The cache is only an optimization; a missing or read-only directory must not fail the run
+        pass
     if not missing_steps:
         print("All step definitions already exist.")
         return
-    step_def_file = os.path.join(step_def_dir, 'StepDefinitions.java')
-    with open(step_def_file, 'a', encoding='utf-8') as f:
-        for step in missing_steps:
-            f.write(generate_java_step_def(step))
-            f.write('\n')
     print(f"Added {len(missing_steps)} new step definitions to {step_def_file}")
 
+def update_or_create_step_defs(feature_dir: str, step_def_dir: str, jobs: int = 1):
+    """
+    For each feature file, ensure all steps have a Java step definition.
+    If not present, append stub to a StepDefinitions.java file.
+    Skips all work when neither the feature files nor any Java file in step_def_dir changed since the last run.
+    """
+    feature_paths, digest = _feature_fingerprint(feature_dir)
+    java_key = _java_fingerprint(step_def_dir)
+    cache = _read_step_cache(os.path.join(step_def_dir, _STEP_CACHE_FILE))
+    if cache.get('digest') == digest and cache.get('java') == java_key:
+        print("No feature changes since last run.")
+        return
+    all_steps = set()
+    for path in feature_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            all_steps.update(extract_steps_from_feature(f))
+    _add_missing_step_defs(all_steps, step_def_dir, jobs, cache, digest, java_key)
+
+def update_or_create_step_defs_from_set(all_steps, step_def_dir: str, jobs: int = 1):
+    """
+    Ensure every step in all_steps (as returned by generate_bdd_features) has a Java step definition,
+    without re-reading any feature files.
+    """
+    cache = _read_step_cache(os.path.join(step_def_dir, _STEP_CACHE_FILE))
+    # Keep the feature digest of an earlier update_or_create_step_defs run on this directory
+    _add_missing_step_defs(set(all_steps), step_def_dir, jobs, cache, cache.get('digest'), _java_fingerprint(step_def_dir))
+
 # --- CLI update ---
 def main():
     import argparse
@@ -131,11 +371,12 @@ def main():
     parser.add_argument("analysis_json", help="Path to controllers.json from java_code_analyzer.py")
     parser.add_argument("--output_dir", default="features", help="Directory to write .feature files")
     parser.add_argument("--step_def_dir", default="stepdefs", help="Directory for Java step definitions")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Number of worker processes (1 disables parallelism)")
     args = parser.parse_args()
     analysis = load_analysis(args.analysis_json)
-    generate_bdd_features(analysis, args.output_dir)
+    all_steps = generate_bdd_features(analysis, args.output_dir, args.jobs)
     os.makedirs(args.step_def_dir, exist_ok=True)
-    update_or_create_step_defs(args.output_dir, args.step_def_dir)
+    update_or_create_step_defs_from_set(all_steps, args.step_def_dir, args.jobs)
     print(f"All feature files and step definitions generated.")
 
 if __name__ == "__main__":
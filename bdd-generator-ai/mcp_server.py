@@ -1,10 +1,42 @@
 from fastapi import FastAPI, HTTPException
 import os
-import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from tachyons import Client as TachyonsClient
 
+# orjson is optional; it serializes the context and responses considerably faster
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as ResponseClass
+
+    def dumps_context(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    import json
+    from fastapi.responses import JSONResponse as ResponseClass
+
+    def dumps_context(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+# Run the blocking Tachyons SDK calls on a bounded pool, so they don't stall the event loop
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tachyons_executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("TACHYONS_MAX_WORKERS", "8")),
+        thread_name_prefix="tachyons",
+    )
+    asyncio.get_running_loop().set_default_executor(tachyons_executor)
+    try:
+        yield
+    finally:
+        tachyons_executor.shutdown(wait=True)
+
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Function to initialize Tachyons API client
 def initialize_tachyons_client():
@@ -16,8 +48,40 @@ def initialize_tachyons_client():
 # Initialize Tachyons client
 tachyons_client = initialize_tachyons_client()
 
+# Prompt pieces surrounding the serialized context
+_PROMPT_PREFIX = (
+    "You are a QA engineer. Based on the following context, "
+    "generate detailed BDD feature files in Gherkin syntax.\n\n"
+    "Context:\n"
+)
+_PROMPT_SUFFIX = "\n\nOutput:\n"
+
+# Identical prompts (e.g. CI retries) reuse the previous generation. Entries are
+# keyed by a fixed-size digest so the (potentially large) prompts aren't retained.
+_GENERATION_CACHE_SIZE = 128
+_generation_cache = OrderedDict()
+_generation_cache_lock = threading.Lock()
+
+def generate_features(prompt: str) -> str:
+    key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+    with _generation_cache_lock:
+        if key in _generation_cache:
+            _generation_cache.move_to_end(key)
+            return _generation_cache[key]
+    response = tachyons_client.generate(
+        model="tachyons-gpt-4",
+        input=prompt
+    )
+    output = response["output"]
+    with _generation_cache_lock:
+        _generation_cache[key] = output
+        _generation_cache.move_to_end(key)
+        if len(_generation_cache) > _GENERATION_CACHE_SIZE:
+            _generation_cache.popitem(last=False)
+    return output
+
 # Endpoint to process Model Context Protocol (MCP)
-@app.post("/process-context")
+@app.post("/process-context", response_class=ResponseClass)
 async def process_context(context: dict):
     try:
         dependency_graph = context.get("dependency_graph", {})
@@ -30,7 +94,13 @@ async def process_context(context: dict):
         # Query Tachyons vector database
         vector_results = []
         if vector_db_query:
-            vector_results = tachyons_client.query_vector_db(query=vector_db_query, top_k=5)
+            vector_results = await asyncio.to_thread(
+                tachyons_client.query_vector_db, query=vector_db_query, top_k=5
+            )
+
+        # Nothing to generate from; skip serialization and the model call
+        if not relationships and not vector_results and not jira_context:
+            return {"features": ""}
 
         # Combine context
         combined_context = {
@@ -40,19 +110,9 @@ async def process_context(context: dict):
         }
 
         # Generate output using Tachyons
-        prompt = """
-        You are a QA engineer. Based on the following context, generate detailed BDD feature files in Gherkin syntax.
-
-        Context:
-        {context}
-
-        Output:
-        """
-        response = tachyons_client.generate(
-            model="tachyons-gpt-4",
-            input=prompt.format(context=json.dumps(combined_context, indent=2))
-        )
-        return {"features": response["output"]}
+        prompt = _PROMPT_PREFIX + dumps_context(combined_context) + _PROMPT_SUFFIX
+        features = await asyncio.to_thread(generate_features, prompt)
+        return {"features": features}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
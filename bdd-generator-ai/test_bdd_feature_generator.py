@@ -0,0 +1,101 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import bdd_feature_generator as gen
+
+FEATURE = """Feature: ping endpoint in PingController
+
+  Scenario: Successful call to ping
+    Given valid input for ping
+    When the API is called
+    Then the response should indicate success
+"""
+
+class StepDefCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.feature_dir = os.path.join(tmp.name, 'features')
+        self.step_def_dir = os.path.join(tmp.name, 'stepdefs')
+        os.makedirs(self.feature_dir)
+        os.makedirs(self.step_def_dir)
+        self.write(self.feature_dir, 'ping.feature', FEATURE)
+        self.step_def_file = os.path.join(self.step_def_dir, 'StepDefinitions.java')
+
+    def write(self, directory, name, content):
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def run_update(self, feature_dir=None, step_def_dir=None):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            gen.update_or_create_step_defs(feature_dir or self.feature_dir, step_def_dir or self.step_def_dir)
+        return out.getvalue()
+
+    def stub_count(self):
+        if not os.path.exists(self.step_def_file):
+            return 0
+        with open(self.step_def_file, encoding='utf-8') as f:
+            return f.read().count('    @')
+
+    def test_noop_rerun(self):
+        self.assertIn("Added 3 new step definitions", self.run_update())
+        self.assertIn("No feature changes since last run.", self.run_update())
+        self.assertEqual(self.stub_count(), 3)
+
+    def test_feature_change(self):
+        self.run_update()
+        self.write(self.feature_dir, 'pong.feature', FEATURE.replace('ping', 'pong'))
+        self.assertIn("Added 1 new step definitions", self.run_update())
+        self.assertEqual(self.stub_count(), 4)
+
+    def test_other_java_file_edited_or_deleted(self):
+        other = ('@Given("valid input for ping")\n'
+                 '@When("the API is called")\n'
+                 '@Then("the response should indicate success")\n')
+        self.write(self.step_def_dir, 'Other.java', other)
+        self.assertIn("All step definitions already exist.", self.run_update())
+        # Dropping one step from Other.java must be noticed
+        self.write(self.step_def_dir, 'Other.java', other.split('\n', 1)[1])
+        self.assertIn("Added 1 new step definitions", self.run_update())
+        os.remove(os.path.join(self.step_def_dir, 'Other.java'))
+        self.assertIn("Added 2 new step definitions", self.run_update())
+        self.assertEqual(self.stub_count(), 3)
+
+    def test_missing_step_def_dir(self):
+        empty_dir = os.path.join(self.feature_dir, 'empty')
+        os.makedirs(empty_dir)
+        missing_dir = os.path.join(self.step_def_dir, 'missing')
+        self.assertIn("All step definitions already exist.", self.run_update(empty_dir, missing_dir))
+        self.assertFalse(os.path.exists(missing_dir))
+
+    def test_from_set_keeps_feature_digest(self):
+        self.run_update()
+        with redirect_stdout(io.StringIO()):
+            gen.update_or_create_step_defs_from_set({"Given valid input for ping"}, self.step_def_dir)
+        self.assertIn("No feature changes since last run.", self.run_update())
+
+class GenerateFeaturesTest(unittest.TestCase):
+    def test_returned_steps_match_written_files(self):
+        analysis = {
+            'controllers': [
+                {'name': 'C', 'endpoints': [{'name': 'a', 'service_calls': ['S.call <x>', 'T  t ']}, {'name': 'b'}]},
+                {'name': 'D', 'endpoints': [{'name': 'c <p>'}]},
+            ],
+            'validations': ['NotNull  name', 'trailing '],
+            'exceptions': ['Boom'],
+        }
+        with tempfile.TemporaryDirectory() as out_dir:
+            with redirect_stdout(io.StringIO()):
+                steps = gen.generate_bdd_features(analysis, out_dir)
+            on_disk = set()
+            for name in os.listdir(out_dir):
+                with open(os.path.join(out_dir, name), encoding='utf-8') as f:
+                    on_disk.update(gen.extract_steps_from_feature(f))
+        self.assertEqual(steps, on_disk)
+
+if __name__ == '__main__':
+    unittest.main()